@@ -4,6 +4,7 @@ from xgboost_ray.matrix import (
     RayDeviceQuantileDMatrix,
     RayDMatrix,
     RayFileType,
+    RayQuantileDMatrix,
     RayShardingMode,
     combine_data,
 )
@@ -27,6 +28,7 @@ __all__ = [
     "RayParams",
     "RayDMatrix",
     "RayDeviceQuantileDMatrix",
+    "RayQuantileDMatrix",
     "RayFileType",
     "RayShardingMode",
     "Data",
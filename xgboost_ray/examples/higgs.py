@@ -1,9 +1,25 @@
+import argparse
+import glob
+import math
 import os
 import time
 
-from xgboost_ray import RayDMatrix, RayParams, train
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import ray
+
+from xgboost_ray import RayFileType, RayParams, RayQuantileDMatrix, train
 
 FILENAME_CSV = "HIGGS.csv.gz"
+FILENAME_FEATHER = "HIGGS.feather"
+DIRNAME_PARTS = "higgs_parts"
+
+# Fixed number of files, so existing parts can be reused regardless of
+# the number of actors. Every actor needs at least one file.
+NUM_PARTS = 16
+
+COLNAMES = ["label"] + ["feature-%02d" % i for i in range(1, 29)]
 
 
 def download_higgs(target_file):
@@ -26,24 +42,90 @@ def download_higgs(target_file):
     return os.path.exists(target_file)
 
 
-def main():
+def csv_to_feather(in_file, out_file, column_names=None):
+    if os.path.exists(out_file):
+        return False
+
+    print(f"Converting CSV {in_file} to FEATHER {out_file}")
+    reader = pacsv.open_csv(
+        in_file,
+        read_options=pacsv.ReadOptions(column_names=column_names),
+    )
+    # Stream the CSV batch by batch. The file is written uncompressed, so
+    # it can later be memory-mapped and read without decoding the buffers.
+    with pa.OSFile(out_file, "wb") as sink:
+        with pa.ipc.new_file(sink, reader.schema) as writer:
+            for batch in reader:
+                writer.write_batch(batch)
+    return True
+
+
+def write_parts(in_file, out_dir, num_files):
+    print(f"Splitting FEATHER {in_file} into {num_files} PARQUET files in {out_dir}")
+    # The Feather file is uncompressed, so the table read from the memory
+    # map references the mapped pages instead of a decoded copy.
+    with pa.memory_map(in_file, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+        rows_per_file = math.ceil(table.num_rows / num_files)
+        rows_per_group = min(rows_per_file, 1 << 20)
+        ds.write_dataset(
+            table,
+            out_dir,
+            format="parquet",
+            basename_template="part-{i}.parquet",
+            max_rows_per_file=rows_per_file,
+            min_rows_per_group=rows_per_group,
+            max_rows_per_group=rows_per_group,
+        )
+
+
+def main(num_actors=4, cpus_per_actor=None):
     # Example adapted from this blog post:
     # https://medium.com/rapids-ai/a-new-official-dask-api-for-xgboost-e8b10f3d1eb7
     # This uses the HIGGS dataset. Download here:
     # https://archive.ics.uci.edu/ml/machine-learning-databases/00280/HIGGS.csv.gz
 
-    if not os.path.exists(FILENAME_CSV):
-        assert download_higgs(FILENAME_CSV), "Downloading of HIGGS dataset failed."
-        print("HIGGS dataset downloaded.")
+    if not os.path.exists(DIRNAME_PARTS):
+        if not os.path.exists(FILENAME_FEATHER):
+            if not os.path.exists(FILENAME_CSV):
+                assert download_higgs(
+                    FILENAME_CSV
+                ), "Downloading of HIGGS dataset failed."
+                print("HIGGS dataset downloaded.")
+            csv_to_feather(FILENAME_CSV, FILENAME_FEATHER, column_names=COLNAMES)
+        # Split into several files, so every actor reads its own shards
+        # in parallel.
+        write_parts(FILENAME_FEATHER, DIRNAME_PARTS, NUM_PARTS)
     else:
         print("HIGGS dataset found locally.")
 
-    colnames = ["label"] + ["feature-%02d" % i for i in range(1, 29)]
+    files = sorted(glob.glob(os.path.join(os.path.abspath(DIRNAME_PARTS), "*.parquet")))
+
+    # Each actor loads its own files. Pass a shorter list of columns here
+    # to train on a subset of the features. The data is quantized once when
+    # the local matrix is built, as needed by the `hist` tree method.
+    dtrain = RayQuantileDMatrix(
+        files,
+        label="label",
+        columns=COLNAMES,
+        filetype=RayFileType.PARQUET,
+        distributed=True,
+    )
 
-    dtrain = RayDMatrix(os.path.abspath(FILENAME_CSV), label="label", names=colnames)
+    # Reserve the CPUs per actor with Ray. Each actor sets XGBoost's
+    # `nthread` to the CPUs it was assigned, so the actors don't
+    # oversubscribe the node.
+    resources = ray.cluster_resources()
+    num_cpus = max(1, int(resources.get("CPU", 1)))
+    # Don't start more actors than there are CPUs or files to place them on
+    num_actors = min(num_actors, num_cpus, NUM_PARTS)
+    if not cpus_per_actor:
+        cpus_per_actor = max(1, num_cpus // num_actors)
+    # Train on GPUs if every actor can get one
+    use_gpu = resources.get("GPU", 0) >= num_actors
 
     config = {
-        "tree_method": "hist",
+        "tree_method": "gpu_hist" if use_gpu else "hist",
         "eval_metric": ["logloss", "error"],
     }
 
@@ -54,23 +136,50 @@ def main():
         config,
         dtrain,
         evals_result=evals_result,
-        ray_params=RayParams(max_actor_restarts=1, num_actors=1),
+        ray_params=RayParams(
+            max_actor_restarts=1,
+            num_actors=num_actors,
+            cpus_per_actor=cpus_per_actor,
+            gpus_per_actor=1 if use_gpu else 0,
+        ),
         num_boost_round=100,
         evals=[(dtrain, "train")],
     )
     taken = time.time() - start
     print(f"TRAIN TIME TAKEN: {taken:.2f} seconds")
 
-    bst.save_model("higgs.xgb")
+    # The .ubj extension selects XGBoost's binary UBJSON model format,
+    # which is smaller and faster to write than JSON. Load it again with
+    # `xgboost.Booster(model_file="higgs.ubj")`.
+    bst.save_model("higgs.ubj")
     print("Final training error: {:.4f}".format(evals_result["train"]["error"][-1]))
 
 
 if __name__ == "__main__":
-    import ray
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--address", required=False, type=str, help="the address to use for Ray"
+    )
+    parser.add_argument(
+        "--cpus-per-actor",
+        type=int,
+        default=None,
+        help="Sets number of CPUs per xgboost training worker. Defaults to "
+        "splitting the cluster CPUs evenly between the workers.",
+    )
+    parser.add_argument(
+        "--num-actors",
+        type=int,
+        default=4,
+        help="Sets number of xgboost workers to use. Capped at the number "
+        "of CPUs in the cluster.",
+    )
+
+    args, _ = parser.parse_known_args()
 
-    ray.init()
+    ray.init(address=args.address)
 
     start = time.time()
-    main()
+    main(args.num_actors, args.cpus_per_actor)
     taken = time.time() - start
     print(f"TOTAL TIME TAKEN: {taken:.2f} seconds")
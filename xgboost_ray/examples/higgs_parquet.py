@@ -1,10 +1,10 @@
 import os
 import time
 
-import pandas as pd
 import pyarrow as pa
+import pyarrow.csv as pacsv
 import pyarrow.parquet as pq
-from higgs import download_higgs
+from higgs import COLNAMES, download_higgs
 
 from xgboost_ray import RayDMatrix, RayParams, train
 
@@ -12,31 +12,35 @@ FILENAME_CSV = "HIGGS.csv.gz"
 FILENAME_PARQUET = "HIGGS.parquet"
 
 
-def csv_to_parquet(in_file, out_file, chunksize=100_000, **csv_kwargs):
+def csv_to_parquet(in_file, out_file, column_names=None, row_group_size=1 << 20):
     if os.path.exists(out_file):
         return False
 
     print(f"Converting CSV {in_file} to PARQUET {out_file}")
-    csv_stream = pd.read_csv(
-        in_file, sep=",", chunksize=chunksize, low_memory=False, **csv_kwargs
+    reader = pacsv.open_csv(
+        in_file,
+        read_options=pacsv.ReadOptions(column_names=column_names),
     )
-
-    parquet_schema = None
-    parquet_writer = None
-    for i, chunk in enumerate(csv_stream):
-        print("Chunk", i)
-        if not parquet_schema:
-            # Guess the schema of the CSV file from the first chunk
-            parquet_schema = pa.Table.from_pandas(df=chunk).schema
-            # Open a Parquet file for writing
-            parquet_writer = pq.ParquetWriter(
-                out_file, parquet_schema, compression="snappy"
+    # Stream the CSV in batches and only buffer up to one row group,
+    # so the full dataset is never held in memory.
+    with pq.ParquetWriter(out_file, reader.schema, compression="zstd") as writer:
+        batches = []
+        num_rows = 0
+        for batch in reader:
+            batches.append(batch)
+            num_rows += batch.num_rows
+            if num_rows >= row_group_size:
+                table = pa.Table.from_batches(batches)
+                writer.write_table(
+                    table.slice(0, row_group_size), row_group_size=row_group_size
+                )
+                rest = table.slice(row_group_size)
+                batches = rest.to_batches()
+                num_rows = rest.num_rows
+        if num_rows > 0:
+            writer.write_table(
+                pa.Table.from_batches(batches), row_group_size=row_group_size
             )
-        # Write CSV chunk to the parquet file
-        table = pa.Table.from_pandas(chunk, schema=parquet_schema)
-        parquet_writer.write_table(table)
-
-    parquet_writer.close()
     return True
 
 
@@ -51,47 +55,11 @@ def main():
             download_higgs(FILENAME_CSV)
             print("Downloaded HIGGS csv dataset")
         print("Converting HIGGS csv dataset to parquet")
-        csv_to_parquet(
-            FILENAME_CSV,
-            FILENAME_PARQUET,
-            names=[
-                "label",
-                "feature-01",
-                "feature-02",
-                "feature-03",
-                "feature-04",
-                "feature-05",
-                "feature-06",
-                "feature-07",
-                "feature-08",
-                "feature-09",
-                "feature-10",
-                "feature-11",
-                "feature-12",
-                "feature-13",
-                "feature-14",
-                "feature-15",
-                "feature-16",
-                "feature-17",
-                "feature-18",
-                "feature-19",
-                "feature-20",
-                "feature-21",
-                "feature-22",
-                "feature-23",
-                "feature-24",
-                "feature-25",
-                "feature-26",
-                "feature-27",
-                "feature-28",
-            ],
-        )
-
-    colnames = ["label"] + ["feature-%02d" % i for i in range(1, 29)]
+        csv_to_parquet(FILENAME_CSV, FILENAME_PARQUET, column_names=COLNAMES)
 
     # Here we load the Parquet file
     dtrain = RayDMatrix(
-        os.path.abspath(FILENAME_PARQUET), label="label", columns=colnames
+        os.path.abspath(FILENAME_PARQUET), label="label", columns=COLNAMES
     )
 
     config = {
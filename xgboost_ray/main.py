@@ -174,6 +174,12 @@ LEGACY_WARNING = (
 # XGBoost Version for comparisions
 XGBOOST_VERSION = Version(xgboost_version)
 
+# Whether `xgb.DMatrix` accepts the `qid` argument. Checked once here
+# instead of inspecting the signature for every DMatrix we create
+DMATRIX_SUPPORTS_QID = (
+    xgb is not None and "qid" in inspect.signature(xgb.DMatrix).parameters
+)
+
 
 class RayXGBoostTrainingError(RuntimeError):
     """Raised from RayXGBoostActor.train() when the local xgb.train function
@@ -376,15 +382,48 @@ def _prepare_dmatrix_params(param: Dict) -> Dict:
     return dm_param
 
 
-def _get_dmatrix(data: RayDMatrix, param: Dict) -> xgb.DMatrix:
-    if QUANTILE_AVAILABLE and isinstance(data, RayQuantileDMatrix):
+def _uses_hist_tree_method(params: Dict) -> bool:
+    tree_method = params.get("tree_method") or "auto"
+    if tree_method == "auto":
+        # `hist` is the default tree method since XGBoost 2.0
+        return XGBOOST_VERSION >= Version("2.0.0")
+    return tree_method in ("hist", "gpu_hist")
+
+
+def _get_dmatrix(
+    data: RayDMatrix,
+    param: Dict,
+    train_params: Optional[Dict] = None,
+    ref: Optional[xgb.DMatrix] = None,
+) -> xgb.DMatrix:
+    """Create the local xgboost matrix from the loaded data shards.
+
+    ``train_params`` and ``ref`` are only used for ``RayQuantileDMatrix``
+    objects. These are quantized only for training with the ``hist`` tree
+    method, using ``max_bin`` from the training parameters, and evaluation
+    matrices re-use the quantile cuts of the training matrix passed as
+    ``ref``. Otherwise, e.g. for prediction, a regular ``xgb.DMatrix``
+    is created.
+    """
+    if (
+        QUANTILE_AVAILABLE
+        and isinstance(data, RayQuantileDMatrix)
+        and train_params is not None
+        and _uses_hist_tree_method(train_params)
+    ):
         if isinstance(param["data"], list):
             qdm_param = _prepare_dmatrix_params(param)
             param.update(qdm_param)
         if data.enable_categorical is not None:
             param["enable_categorical"] = data.enable_categorical
-        matrix = xgb.QuantileDMatrix(**param)
-    if not LEGACY_MATRIX and isinstance(data, RayDeviceQuantileDMatrix):
+        # Don't store these in `param`, as it is cached across training runs
+        quantile_param = {}
+        if train_params.get("max_bin") is not None:
+            quantile_param["max_bin"] = train_params["max_bin"]
+        if ref is not None:
+            quantile_param["ref"] = ref
+        matrix = xgb.QuantileDMatrix(**param, **quantile_param)
+    elif not LEGACY_MATRIX and isinstance(data, RayDeviceQuantileDMatrix):
         # If we only got a single data shard, create a list so we can
         # iterate over it
         if not isinstance(param["data"], list):
@@ -428,7 +467,7 @@ def _get_dmatrix(data: RayDMatrix, param: Dict) -> xgb.DMatrix:
         if LEGACY_MATRIX:
             param.pop("base_margin", None)
 
-        if "qid" not in inspect.signature(xgb.DMatrix).parameters:
+        if not DMATRIX_SUPPORTS_QID:
             param.pop("qid", None)
 
         if data.enable_categorical is not None:
@@ -722,7 +761,9 @@ class RayXGBoostActor:
         def _train():
             try:
                 with _RabitContext(str(id(self)), rabit_args):
-                    local_dtrain = _get_dmatrix(dtrain, self._data[dtrain])
+                    local_dtrain = _get_dmatrix(
+                        dtrain, self._data[dtrain], train_params=local_params
+                    )
 
                     if not local_dtrain.get_label().size:
                         raise RuntimeError(
@@ -732,11 +773,27 @@ class RayXGBoostActor:
                             "to train on."
                         )
 
+                    # Quantized eval matrices should use the training cuts
+                    ref = None
+                    if QUANTILE_AVAILABLE and isinstance(
+                        local_dtrain, xgb.QuantileDMatrix
+                    ):
+                        ref = local_dtrain
+
                     local_evals = []
                     for deval, name in evals:
-                        local_evals.append(
-                            (_get_dmatrix(deval, self._data[deval]), name)
+                        if deval == dtrain:
+                            # Re-use the training matrix instead of building
+                            # the same DMatrix a second time
+                            local_evals.append((local_dtrain, name))
+                            continue
+                        local_deval = _get_dmatrix(
+                            deval,
+                            self._data[deval],
+                            train_params=local_params,
+                            ref=ref,
                         )
+                        local_evals.append((local_deval, name))
                     if LEGACY_CALLBACK:
                         for xgb_callback in kwargs.get("callbacks", []):
                             if isinstance(xgb_callback, TrainingCallback):
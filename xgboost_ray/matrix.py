@@ -22,6 +22,11 @@ try:
 except ImportError:
     cp = None
 
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
 import os
 
 import numpy as np
@@ -49,11 +54,11 @@ except ImportError:
     LEGACY_MATRIX = True
 
 try:
-    from xgboost.core import QuantileDmatrix
+    from xgboost.core import QuantileDMatrix
 
     QUANTILE_AVAILABLE = True
 except ImportError:
-    QuantileDmatrix = object
+    QuantileDMatrix = object
     QUANTILE_AVAILABLE = False
 
 if TYPE_CHECKING:
@@ -62,8 +67,13 @@ if TYPE_CHECKING:
 Data = Union[str, List[str], np.ndarray, pd.DataFrame, pd.Series]
 
 
-def concat_dataframes(dfs: List[Optional[pd.DataFrame]]):
+def concat_dataframes(dfs: List[Optional[Union[pd.DataFrame, "pa.Table"]]]):
     filtered = [df for df in dfs if df is not None]
+    if pa is not None and filtered and all(isinstance(df, pa.Table) for df in filtered):
+        # Arrow tables are concatenated by referencing their chunks,
+        # without copying the column data. The data sources currently
+        # return pandas or numpy shards, so only direct callers get here.
+        return pa.concat_tables(filtered)
     return pd.concat(filtered, ignore_index=True, copy=False)
 
 
@@ -957,8 +967,22 @@ class RayDMatrix:
         return self.__hash__() == other.__hash__()
 
 
+@PublicAPI(stability="beta")
 class RayQuantileDMatrix(RayDMatrix):
-    """Currently just a thin wrapper for type detection"""
+    """XGBoost on Ray QuantileDMatrix class.
+
+    Accepts the same arguments as :class:`RayDMatrix`. When training with
+    the ``hist`` tree method, the data is loaded into an
+    ``xgboost.QuantileDMatrix`` on the actors, which stores the quantized
+    data instead of the raw values. This reduces memory usage. The number
+    of bins is taken from the ``max_bin`` training parameter. When used as
+    an evaluation set, the matrix is quantized with the cuts of the
+    training matrix.
+
+    For other tree methods and for prediction, a regular
+    ``xgboost.DMatrix`` is created instead. The same applies to
+    ``xgboost<1.7``.
+    """
 
     pass
 
@@ -1081,11 +1105,11 @@ def _get_sharding_indices(
     if sharding == RayShardingMode.BATCH:
         # based on numpy.array_split
         # github.com/numpy/numpy/blob/v1.21.0/numpy/lib/shape_base.py
+        # The first `extras` actors get one additional row each
         n_per_actor, extras = divmod(n, num_actors)
-        div_points = np.array(
-            [0] + extras * [n_per_actor + 1] + (num_actors - extras) * [n_per_actor]
-        ).cumsum()
-        indices = list(range(div_points[rank], div_points[rank + 1]))
+        start = rank * n_per_actor + min(rank, extras)
+        end = start + n_per_actor + (1 if rank < extras else 0)
+        indices = list(range(start, end))
     elif sharding == RayShardingMode.INTERLEAVED:
         indices = list(range(rank, n, num_actors))
     else:
@@ -10,9 +10,17 @@ from ray.exceptions import RayActorError, RayTaskError
 from ray.util.scheduling_strategies import PlacementGroupSchedulingStrategy
 from scipy.sparse import csr_matrix
 
-from xgboost_ray import RayDMatrix, RayParams, RayShardingMode, predict, train
+from xgboost_ray import (
+    RayDMatrix,
+    RayParams,
+    RayQuantileDMatrix,
+    RayShardingMode,
+    predict,
+    train,
+)
 from xgboost_ray.callback import DistributedCallback
 from xgboost_ray.main import RayXGBoostTrainingError
+from xgboost_ray.matrix import QUANTILE_AVAILABLE
 from xgboost_ray.tests.utils import get_num_trees
 
 
@@ -253,6 +261,64 @@ class XGBoostRayEndToEndTest(unittest.TestCase):
 
         self.assertSequenceEqual(list(self.y), list(pred_y))
 
+    @unittest.skipUnless(
+        QUANTILE_AVAILABLE, f"not supported in xgb version {xgb.__version__}"
+    )
+    def testTrainQuantileMaxBin(self):
+        """Train on quantile matrices with a non-default `max_bin`"""
+        ray.init(num_cpus=2, num_gpus=0)
+
+        dtrain = RayQuantileDMatrix(self.x, self.y)
+        # A separate eval matrix is quantized with the training cuts
+        deval = RayQuantileDMatrix(self.x, self.y)
+
+        params = self.params.copy()
+        params["tree_method"] = "hist"
+        params["max_bin"] = 16
+
+        evals_result = {}
+        bst = train(
+            params,
+            dtrain,
+            num_boost_round=10,
+            ray_params=RayParams(num_actors=2),
+            evals=[(dtrain, "dtrain"), (deval, "deval")],
+            evals_result=evals_result,
+        )
+
+        self.assertEqual(get_num_trees(bst), 10)
+        # Same data and same cuts, so both evaluations should match
+        np.testing.assert_allclose(
+            evals_result["dtrain"]["mlogloss"], evals_result["deval"]["mlogloss"]
+        )
+
+    @unittest.skipUnless(
+        QUANTILE_AVAILABLE, f"not supported in xgb version {xgb.__version__}"
+    )
+    def testTrainQuantileExact(self):
+        """Quantile matrices fall back to a DMatrix for non-hist methods"""
+        ray.init(num_cpus=2, num_gpus=0)
+
+        dtrain = RayQuantileDMatrix(self.x, self.y)
+
+        params = self.params.copy()
+        params["tree_method"] = "exact"
+
+        bst = train(
+            params,
+            dtrain,
+            num_boost_round=10,
+            ray_params=RayParams(num_actors=2),
+            evals=[(dtrain, "dtrain")],
+        )
+
+        self.assertEqual(get_num_trees(bst), 10)
+
+        # Prediction also uses a regular DMatrix
+        x_mat = RayQuantileDMatrix(self.x)
+        pred_y = predict(bst, x_mat, ray_params=RayParams(num_actors=2))
+        self.assertSequenceEqual(list(self.y), list(pred_y.astype(int)))
+
     def testTrainPredictSoftprob(self):
         """Train with evaluation and predict on softprob objective
         (which returns predictions in a 2d array)
@@ -1,3 +1,4 @@
+import glob
 import inspect
 import os
 import tempfile
@@ -5,8 +6,12 @@ import unittest
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.dataset as pds
 import ray
 import xgboost as xgb
+from packaging.version import Version
 
 try:
     import ray.data as ray_data
@@ -15,32 +20,116 @@ except (ImportError, ModuleNotFoundError):
     ray_data = None
 
 from xgboost_ray import RayDMatrix
-from xgboost_ray.matrix import RayShardingMode, _get_sharding_indices, concat_dataframes
+from xgboost_ray.data_sources.dask import DASK_INSTALLED
+from xgboost_ray.data_sources.modin import MODIN_INSTALLED
+from xgboost_ray.data_sources.petastorm import PETASTORM_INSTALLED
+from xgboost_ray.main import _get_dmatrix
+from xgboost_ray.matrix import (
+    QUANTILE_AVAILABLE,
+    RayQuantileDMatrix,
+    RayShardingMode,
+    _get_sharding_indices,
+    concat_dataframes,
+)
+
+if DASK_INSTALLED:
+    import dask.array as da
+    import dask.dataframe as dd
+
+if MODIN_INSTALLED:
+    import modin.pandas as mpd
+
+XGB_SUPPORTS_FEATURE_WEIGHTS = Version(xgb.__version__) >= Version("1.3.0")
+XGB_SUPPORTS_QID = "qid" in inspect.signature(xgb.DMatrix).parameters
+
+# `parallelism` was renamed to `override_num_blocks` in Ray 2.10
+RAY_DATA_NUM_BLOCKS_ARG = (
+    "override_num_blocks"
+    if Version(ray.__version__) >= Version("2.10.0")
+    else "parallelism"
+)
+
+
+def setUpModule():
+    # Share one Ray runtime between all test classes in this module. The
+    # tests only move a few kilobytes, so keep the runtime small and quiet.
+    # Ray does not accept object stores smaller than 75 MiB.
+    ray.init(
+        num_cpus=2,
+        object_store_memory=80 * 1024 * 1024,
+        include_dashboard=False,
+        log_to_driver=False,
+        _system_config={"automatic_object_spilling_enabled": False},
+    )
+
+
+def tearDownModule():
+    ray.shutdown()
 
 
 class XGBoostRayDMatrixTest(unittest.TestCase):
     """This test suite validates core RayDMatrix functionality."""
 
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
         repeat = 8  # Repeat data a couple of times for stability
-        self.x = np.array(
+        x = np.array(
             [
                 [1, 0, 0, 0],  # Feature 0 -> Label 0
                 [0, 1, 0, 0],  # Feature 1 -> Label 1
                 [0, 0, 1, 1],  # Feature 2+3 -> Label 2
                 [0, 0, 1, 0],  # Feature 2+!3 -> Label 3
-            ]
-            * repeat
+            ],
+            dtype=np.int64,
+        )
+        # Shared by all tests, so make sure no test modifies them
+        cls.x = np.tile(x, (repeat, 1))
+        cls.x.setflags(write=False)
+        cls.y = np.tile(np.arange(4, dtype=np.int64), repeat)
+        cls.y.setflags(write=False)
+
+        # Write the file fixtures once, all file based tests read from them
+        cls._tmp = tempfile.TemporaryDirectory()
+
+        data_df = pd.DataFrame(cls.x, columns=["a", "b", "c", "d"])
+        data_df["label"] = pd.Series(cls.y)
+
+        table = pa.Table.from_pandas(data_df, preserve_index=False)
+        half = table.num_rows // 2
+
+        data_df.to_parquet(cls._get_file("data.parquet"))
+
+        # Write both halves in a single pass, one directory per shard.
+        # The tests compare the exact row order, which write_dataset only
+        # keeps when writing without threads.
+        shard = np.repeat([0, 1], [half, table.num_rows - half])
+        pds.write_dataset(
+            table.append_column("shard", pa.array(shard)),
+            cls._get_file("data_parts"),
+            format="parquet",
+            partitioning=["shard"],
+            basename_template="part-{i}.parquet",
+            use_threads=False,
+        )
+        cls._multi_parquet_files = sorted(
+            glob.glob(cls._get_file(os.path.join("data_parts", "*", "*.parquet")))
+        )
+        assert len(cls._multi_parquet_files) == 2, (
+            f"Expected one Parquet file per shard, got "
+            f"{cls._multi_parquet_files}"
         )
-        self.y = np.array([0, 1, 2, 3] * repeat)
 
-    @classmethod
-    def setUpClass(cls):
-        ray.init()
+        pacsv.write_csv(table, cls._get_file("data.csv"))
+        pacsv.write_csv(table.slice(0, half), cls._get_file("data_1.csv"))
+        pacsv.write_csv(table.slice(half), cls._get_file("data_2.csv"))
 
     @classmethod
     def tearDownClass(cls):
-        ray.shutdown()
+        cls._tmp.cleanup()
+
+    @classmethod
+    def _get_file(cls, name):
+        return os.path.join(cls._tmp.name, name)
 
     def testSameObject(self):
         """Test that matrices are recognized as the same in an actor task."""
@@ -56,32 +145,52 @@ class XGBoostRayDMatrixTest(unittest.TestCase):
         """When excluding cols, the remaining col order should be preserved."""
 
         cols = [str(i) for i in range(50)]
-        df = pd.DataFrame(np.random.randn(1, len(cols)), columns=cols)
+        # Only the column names matter here, so skip generating values
+        df = pd.DataFrame(np.empty((1, len(cols)), dtype=np.float32), columns=cols)
         matrix = RayDMatrix(df, label=cols[-1], num_actors=1)
         data = matrix.get_data(0)["data"]
 
         assert data.columns.tolist() == cols[:-1]
 
+    def testConcatDataframesArrow(self):
+        """Arrow tables should be concatenated without converting them."""
+        table = pa.Table.from_pandas(
+            pd.DataFrame(self.x, columns=["a", "b", "c", "d"]), preserve_index=False
+        )
+        half = table.num_rows // 2
+
+        res = concat_dataframes([table.slice(0, half), None, table.slice(half)])
+        self.assertIsInstance(res, pa.Table)
+        self.assertEqual(res.column("a").num_chunks, 2)
+        np.testing.assert_array_equal(self.x, res.to_pandas().to_numpy())
+
     def _testMatrixCreation(self, in_x, in_y, **kwargs):
         if "sharding" not in kwargs:
             kwargs["sharding"] = RayShardingMode.BATCH
         mat = RayDMatrix(in_x, in_y, **kwargs)
 
-        def _load_data(params):
-            x = params["data"]
-            y = params["label"]
+        def _to_numpy(data):
+            # The assertions compare numpy arrays, so concatenate shards as
+            # arrays instead of building an intermediate dataframe
+            if isinstance(data, list):
+                return _concat([_to_numpy(d) for d in data])
+            if data is None:
+                return None
+            return np.asarray(data)
+
+        def _concat(arrays):
+            arrays = [a for a in arrays if a is not None]
+            self.assertTrue(arrays, "All loaded shards are empty.")
+            return np.concatenate(arrays, axis=0)
 
-            if isinstance(x, list):
-                x = concat_dataframes(x)
-            if isinstance(y, list):
-                y = concat_dataframes(y)
-            return x, y
+        def _load_data(params):
+            return _to_numpy(params["data"]), _to_numpy(params["label"])
 
         params = mat.get_data(rank=0, num_actors=1)
         x, y = _load_data(params)
 
-        self.assertTrue(np.allclose(self.x, x))
-        self.assertTrue(np.allclose(self.y, y))
+        np.testing.assert_array_equal(self.x, x)
+        np.testing.assert_array_equal(self.y, y)
 
         # Multi actor check
         mat = RayDMatrix(in_x, in_y, **kwargs)
@@ -94,8 +203,8 @@ class XGBoostRayDMatrixTest(unittest.TestCase):
         params = mat.get_data(rank=1, num_actors=2)
         x2, y2 = _load_data(params)
 
-        self.assertTrue(np.allclose(self.x, concat_dataframes([x1, x2])))
-        self.assertTrue(np.allclose(self.y, concat_dataframes([y1, y2])))
+        np.testing.assert_array_equal(self.x, _concat([x1, x2]))
+        np.testing.assert_array_equal(self.y, _concat([y1, y2]))
 
     def testFromNumpy(self):
         in_x = self.x
@@ -117,226 +226,124 @@ class XGBoostRayDMatrixTest(unittest.TestCase):
         in_df["label"] = self.y
         self._testMatrixCreation(in_df, "label")
 
+    @unittest.skipUnless(MODIN_INSTALLED, "Modin not installed.")
     def testFromModinDfDf(self):
-        from xgboost_ray.data_sources.modin import MODIN_INSTALLED
-
-        if not MODIN_INSTALLED:
-            self.skipTest("Modin not installed.")
-            return
-
-        from modin.pandas import DataFrame
-
-        in_x = DataFrame(self.x)
-        in_y = DataFrame(self.y)
+        in_x = mpd.DataFrame(self.x)
+        in_y = mpd.DataFrame(self.y)
         self._testMatrixCreation(in_x, in_y, distributed=False)
 
+    @unittest.skipUnless(MODIN_INSTALLED, "Modin not installed.")
     def testFromModinDfSeries(self):
-        from xgboost_ray.data_sources.modin import MODIN_INSTALLED
-
-        if not MODIN_INSTALLED:
-            self.skipTest("Modin not installed.")
-            return
-
-        from modin.pandas import DataFrame, Series
-
-        in_x = DataFrame(self.x)
-        in_y = Series(self.y)
+        in_x = mpd.DataFrame(self.x)
+        in_y = mpd.Series(self.y)
         self._testMatrixCreation(in_x, in_y, distributed=False)
 
+    @unittest.skipUnless(MODIN_INSTALLED, "Modin not installed.")
     def testFromModinDfString(self):
-        from xgboost_ray.data_sources.modin import MODIN_INSTALLED
-
-        if not MODIN_INSTALLED:
-            self.skipTest("Modin not installed.")
-            return
-
-        from modin.pandas import DataFrame
-
-        in_df = DataFrame(self.x)
+        in_df = mpd.DataFrame(self.x)
         in_df["label"] = self.y
         self._testMatrixCreation(in_df, "label", distributed=False)
         self._testMatrixCreation(in_df, "label", distributed=True)
 
+    @unittest.skipUnless(DASK_INSTALLED, "Dask not installed.")
     def testFromDaskDfSeries(self):
-        from xgboost_ray.data_sources.dask import DASK_INSTALLED
-
-        if not DASK_INSTALLED:
-            self.skipTest("Dask not installed.")
-            return
-
-        import dask.dataframe as dd
-
         in_x = dd.from_array(self.x)
         in_y = dd.from_array(self.y)
 
         self._testMatrixCreation(in_x, in_y, distributed=False)
 
+    @unittest.skipUnless(DASK_INSTALLED, "Dask not installed.")
     def testFromDaskDfArray(self):
-        from xgboost_ray.data_sources.dask import DASK_INSTALLED
-
-        if not DASK_INSTALLED:
-            self.skipTest("Dask not installed.")
-            return
-
-        import dask.array as da
-        import dask.dataframe as dd
-
         in_x = dd.from_array(self.x)
         in_y = da.from_array(self.y)
 
         self._testMatrixCreation(in_x, in_y, distributed=False)
 
+    @unittest.skipUnless(DASK_INSTALLED, "Dask not installed.")
     def testFromDaskDfString(self):
-        from xgboost_ray.data_sources.dask import DASK_INSTALLED
-
-        if not DASK_INSTALLED:
-            self.skipTest("Dask not installed.")
-            return
-
-        import dask.dataframe as dd
-
         in_df = dd.from_array(self.x)
         in_df["label"] = dd.from_array(self.y)
 
         self._testMatrixCreation(in_df, "label", distributed=False)
         self._testMatrixCreation(in_df, "label", distributed=True)
 
+    @unittest.skipUnless(PETASTORM_INSTALLED, "Petastorm not installed.")
     def testFromPetastormParquetString(self):
-        try:
-            import petastorm  # noqa: F401
-        except ImportError:
-            self.skipTest("Petastorm not installed.")
-            return
+        data_file = self._get_file("data.parquet")
 
-        with tempfile.TemporaryDirectory() as dir:
-            data_file = os.path.join(dir, "data.parquet")
-
-            data_df = pd.DataFrame(self.x, columns=["a", "b", "c", "d"])
-            data_df["label"] = pd.Series(self.y)
-            data_df.to_parquet(data_file)
-
-            self._testMatrixCreation(f"file://{data_file}", "label", distributed=False)
-            self._testMatrixCreation(f"file://{data_file}", "label", distributed=True)
+        self._testMatrixCreation(f"file://{data_file}", "label", distributed=False)
+        self._testMatrixCreation(f"file://{data_file}", "label", distributed=True)
 
     def testFromPetastormMultiParquetString(self):
-        with tempfile.TemporaryDirectory() as dir:
-            data_file_1 = os.path.join(dir, "data_1.parquet")
-            data_file_2 = os.path.join(dir, "data_2.parquet")
-
-            data_df = pd.DataFrame(self.x, columns=["a", "b", "c", "d"])
-            data_df["label"] = pd.Series(self.y)
-
-            df_1 = data_df[0 : len(data_df) // 2]
-            df_2 = data_df[len(data_df) // 2 :]
-
-            df_1.to_parquet(data_file_1)
-            df_2.to_parquet(data_file_2)
+        data_file_1, data_file_2 = self._multi_parquet_files
 
-            self._testMatrixCreation(
-                [f"file://{data_file_1}", f"file://{data_file_2}"],
-                "label",
-                distributed=False,
-            )
-            self._testMatrixCreation(
-                [f"file://{data_file_1}", f"file://{data_file_2}"],
-                "label",
-                distributed=True,
-            )
+        self._testMatrixCreation(
+            [f"file://{data_file_1}", f"file://{data_file_2}"],
+            "label",
+            distributed=False,
+        )
+        self._testMatrixCreation(
+            [f"file://{data_file_1}", f"file://{data_file_2}"],
+            "label",
+            distributed=True,
+        )
 
     def testFromCSVString(self):
-        with tempfile.TemporaryDirectory() as dir:
-            data_file = os.path.join(dir, "data.csv")
-
-            data_df = pd.DataFrame(self.x, columns=["a", "b", "c", "d"])
-            data_df["label"] = pd.Series(self.y)
-            data_df.to_csv(data_file, header=True, index=False)
+        data_file = self._get_file("data.csv")
 
-            self._testMatrixCreation(data_file, "label", distributed=False)
-            with self.assertRaises(ValueError):
-                self._testMatrixCreation(data_file, "label", distributed=True)
+        self._testMatrixCreation(data_file, "label", distributed=False)
+        with self.assertRaises(ValueError):
+            self._testMatrixCreation(data_file, "label", distributed=True)
 
     def testFromMultiCSVString(self):
-        with tempfile.TemporaryDirectory() as dir:
-            data_file_1 = os.path.join(dir, "data_1.csv")
-            data_file_2 = os.path.join(dir, "data_2.csv")
-
-            data_df = pd.DataFrame(self.x, columns=["a", "b", "c", "d"])
-            data_df["label"] = pd.Series(self.y)
-
-            df_1 = data_df[0 : len(data_df) // 2]
-            df_2 = data_df[len(data_df) // 2 :]
+        data_file_1 = self._get_file("data_1.csv")
+        data_file_2 = self._get_file("data_2.csv")
 
-            df_1.to_csv(data_file_1, header=True, index=False)
-            df_2.to_csv(data_file_2, header=True, index=False)
-
-            self._testMatrixCreation(
-                [data_file_1, data_file_2], "label", distributed=False
-            )
-            self._testMatrixCreation(
-                [data_file_1, data_file_2], "label", distributed=True
-            )
+        self._testMatrixCreation([data_file_1, data_file_2], "label", distributed=False)
+        self._testMatrixCreation([data_file_1, data_file_2], "label", distributed=True)
 
     def testFromParquetString(self):
-        with tempfile.TemporaryDirectory() as dir:
-            data_file = os.path.join(dir, "data.parquet")
-
-            data_df = pd.DataFrame(self.x, columns=["a", "b", "c", "d"])
-            data_df["label"] = pd.Series(self.y)
-            data_df.to_parquet(data_file)
+        data_file = self._get_file("data.parquet")
 
-            self._testMatrixCreation(data_file, "label", distributed=False)
-            self._testMatrixCreation(data_file, "label", distributed=True)
+        self._testMatrixCreation(data_file, "label", distributed=False)
+        self._testMatrixCreation(data_file, "label", distributed=True)
 
     def testFromMultiParquetString(self):
-        with tempfile.TemporaryDirectory() as dir:
-            data_file_1 = os.path.join(dir, "data_1.parquet")
-            data_file_2 = os.path.join(dir, "data_2.parquet")
-
-            data_df = pd.DataFrame(self.x, columns=["a", "b", "c", "d"])
-            data_df["label"] = pd.Series(self.y)
+        data_file_1, data_file_2 = self._multi_parquet_files
 
-            df_1 = data_df[0 : len(data_df) // 2]
-            df_2 = data_df[len(data_df) // 2 :]
-
-            df_1.to_parquet(data_file_1)
-            df_2.to_parquet(data_file_2)
-
-            self._testMatrixCreation(
-                [data_file_1, data_file_2], "label", distributed=False
-            )
-            self._testMatrixCreation(
-                [data_file_1, data_file_2], "label", distributed=True
-            )
+        self._testMatrixCreation([data_file_1, data_file_2], "label", distributed=False)
+        self._testMatrixCreation([data_file_1, data_file_2], "label", distributed=True)
 
     def testDetectDistributed(self):
-        with tempfile.TemporaryDirectory() as dir:
-            parquet_file = os.path.join(dir, "file.parquet")
-            csv_file = os.path.join(dir, "file.csv")
+        parquet_file = self._get_file("data.parquet")
+        csv_file = self._get_file("data.csv")
 
-            data_df = pd.DataFrame(self.x, columns=["a", "b", "c", "d"])
-            data_df["label"] = pd.Series(self.y)
+        mat = RayDMatrix(parquet_file, lazy=True)
+        self.assertTrue(mat.distributed)
 
-            data_df.to_parquet(parquet_file)
-            data_df.to_csv(csv_file)
+        mat = RayDMatrix(csv_file, lazy=True)
+        # Single CSV files should not be distributed
+        self.assertFalse(mat.distributed)
 
-            mat = RayDMatrix(parquet_file, lazy=True)
-            self.assertTrue(mat.distributed)
+        mat = RayDMatrix([parquet_file] * 3, lazy=True)
+        self.assertTrue(mat.distributed)
 
-            mat = RayDMatrix(csv_file, lazy=True)
-            # Single CSV files should not be distributed
-            self.assertFalse(mat.distributed)
+        mat = RayDMatrix([csv_file] * 3, lazy=True)
+        self.assertTrue(mat.distributed)
 
-            mat = RayDMatrix([parquet_file] * 3, lazy=True)
+        if ray_data:
+            ds = ray_data.read_parquet(parquet_file)
+            mat = RayDMatrix(ds)
             self.assertTrue(mat.distributed)
 
-            mat = RayDMatrix([csv_file] * 3, lazy=True)
+            # One block per file, so both files are read in parallel
+            ds = ray_data.read_parquet(
+                self._multi_parquet_files, **{RAY_DATA_NUM_BLOCKS_ARG: 2}
+            )
+            self.assertEqual(ds.materialize().num_blocks(), 2)
+            mat = RayDMatrix(ds)
             self.assertTrue(mat.distributed)
 
-            if ray_data:
-                ds = ray_data.read_parquet(parquet_file)
-                mat = RayDMatrix(ds)
-                self.assertTrue(mat.distributed)
-
     def testTooManyActorsDistributed(self):
         """Test error when too many actors are passed"""
         with self.assertRaises(RuntimeError):
@@ -353,17 +360,21 @@ class XGBoostRayDMatrixTest(unittest.TestCase):
     def testBatchShardingAllActorsGetIndices(self):
         """Check if all actors get indices with batch mode"""
         for i in range(16):
-            self.assertTrue(_get_sharding_indices(RayShardingMode.BATCH, i, 16, 100))
+            with self.subTest(rank=i):
+                self.assertTrue(
+                    _get_sharding_indices(RayShardingMode.BATCH, i, 16, 100)
+                )
 
     def testLegacyParams(self):
         """Test if all params can be set regardless of xgb version"""
         in_x = self.x
         in_y = self.y
-        weight = np.array([1] * len(in_y))
-        qid = np.array([0] + [1] * len(in_y - 1))
-        base_margin = np.array([1] * len(in_y))
-        label_lower_bound = np.array([0.1] * len(in_y))
-        label_upper_bound = np.array([1] * len(in_y))
+        n = len(in_y)
+        weight = np.ones(n, dtype=np.float32)
+        qid = np.concatenate(([0], np.ones(n - 1, dtype=np.int32)))
+        base_margin = np.ones(n, dtype=np.float32)
+        label_lower_bound = np.full(n, 0.1, dtype=np.float32)
+        label_upper_bound = np.ones(n, dtype=np.float32)
         self._testMatrixCreation(
             in_x,
             in_y,
@@ -381,8 +392,9 @@ class XGBoostRayDMatrixTest(unittest.TestCase):
             label_upper_bound=label_upper_bound,
         )
 
-    @unittest.skipIf(
-        xgb.__version__ < "1.3.0", f"not supported in xgb version {xgb.__version__}"
+    @unittest.skipUnless(
+        XGB_SUPPORTS_FEATURE_WEIGHTS,
+        f"not supported in xgb version {xgb.__version__}",
     )
     def testFeatureWeightsParam(self):
         """Test the feature_weights parameter for xgb version >= 1.3.0"""
@@ -391,9 +403,20 @@ class XGBoostRayDMatrixTest(unittest.TestCase):
         feature_weights = np.arange(len(in_y))
         self._testMatrixCreation(in_x, in_y, feature_weights=feature_weights)
 
-    @unittest.skipIf(
-        "qid" not in inspect.signature(xgb.DMatrix).parameters,
-        f"not supported in xgb version {xgb.__version__}",
+    @unittest.skipUnless(
+        QUANTILE_AVAILABLE, f"not supported in xgb version {xgb.__version__}"
+    )
+    def testQuantileDMatrix(self):
+        """Test that RayQuantileDMatrix creates a local QuantileDMatrix"""
+        mat = RayQuantileDMatrix(self.x, self.y)
+        params = mat.get_data(rank=0, num_actors=1)
+
+        local_mat = _get_dmatrix(mat, params)
+        self.assertIsInstance(local_mat, xgb.QuantileDMatrix)
+        self.assertEqual(local_mat.num_row(), len(self.y))
+
+    @unittest.skipUnless(
+        XGB_SUPPORTS_QID, f"not supported in xgb version {xgb.__version__}"
     )
     def testQidSortedBehaviorXGBoost(self):
         """Test that data with unsorted qid is sorted in RayDMatrix"""
@@ -413,9 +436,8 @@ class XGBoostRayDMatrixTest(unittest.TestCase):
         params = mat.get_data(rank=0, num_actors=1)
         DMatrix(**params)
 
-    @unittest.skipIf(
-        "qid" not in inspect.signature(xgb.DMatrix).parameters,
-        f"not supported in xgb version {xgb.__version__}",
+    @unittest.skipUnless(
+        XGB_SUPPORTS_QID, f"not supported in xgb version {xgb.__version__}"
     )
     def testQidSortedParquet(self):
         from xgboost import DMatrix